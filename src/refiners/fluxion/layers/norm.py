@@ -1,5 +1,6 @@
 from jaxtyping import Float
-from torch import Tensor, device as Device, dtype as DType, nn, ones, sqrt, zeros
+from torch import Tensor, device as Device, dtype as DType, nn, ones, rsqrt, zeros
+from torch.nn.functional import layer_norm  # type: ignore
 
 from refiners.fluxion.layers.module import Module, WeightedModule
 
@@ -9,6 +10,7 @@ class LayerNorm(nn.LayerNorm, WeightedModule):
         self,
         normalized_shape: int | list[int],
         eps: float = 0.00001,
+        use_bias: bool = True,
         device: Device | str | None = None,
         dtype: DType | None = None,
     ) -> None:
@@ -16,9 +18,11 @@ class LayerNorm(nn.LayerNorm, WeightedModule):
             normalized_shape=normalized_shape,
             eps=eps,
             elementwise_affine=True,  # otherwise not a WeightedModule
+            bias=use_bias,
             device=device,
             dtype=dtype,
         )
+        self.use_bias = use_bias
 
 
 class GroupNorm(nn.GroupNorm, WeightedModule):
@@ -47,6 +51,9 @@ class LayerNorm2d(WeightedModule):
     """
     2D Layer Normalization module.
 
+    Each spatial position is normalized over the channel dimension only, as in Segment Anything. This differs from
+    `GroupNorm` with a single group, which would also reduce over the height and width dimensions.
+
     Parameters:
         channels (int): Number of channels in the input tensor.
         eps (float, optional): A small constant for numerical stability. Default: 1e-6.
@@ -60,19 +67,65 @@ class LayerNorm2d(WeightedModule):
         dtype: DType | None = None,
     ) -> None:
         super().__init__()
+        self.channels = channels
         self.weight = nn.Parameter(ones(channels, device=device, dtype=dtype))
         self.bias = nn.Parameter(zeros(channels, device=device, dtype=dtype))
         self.eps = eps
 
     def forward(self, x: Float[Tensor, "batch channels height width"]) -> Float[Tensor, "batch channels height width"]:
-        x_mean = x.mean(1, keepdim=True)
-        x_var = (x - x_mean).pow(2).mean(1, keepdim=True)
-        x_norm = (x - x_mean) / sqrt(x_var + self.eps)
-        x_out = self.weight.unsqueeze(-1).unsqueeze(-1) * x_norm + self.bias.unsqueeze(-1).unsqueeze(-1)
-        return x_out
+        # Normalizing over the last dimension of the NHWC view dispatches to a single fused layer norm kernel instead
+        # of materializing the centered tensor, the variance and the affine output as separate intermediates. For
+        # `channels_last` inputs this view is already contiguous, so no copy is needed before the (vectorized) kernel.
+        x_out = layer_norm(  # type: ignore
+            input=x.permute(0, 2, 3, 1),
+            normalized_shape=(self.channels,),
+            weight=self.weight,
+            bias=self.bias,
+            eps=self.eps,
+        ).permute(0, 3, 1, 2)
+        # The output of the kernel is `channels_last`: restore the layout of contiguous inputs so that downstream
+        # convolutions do not silently switch memory format.
+        return x_out.contiguous() if x.is_contiguous() else x_out
+
+
+class RMSNorm(WeightedModule):
+    """
+    Root Mean Square Layer Normalization module (see https://arxiv.org/abs/1910.07467).
+
+    Unlike `LayerNorm`, the input is not centered: it is only rescaled by its root mean square over the last dimension,
+    which saves one reduction. There is no bias.
+
+    Parameters:
+        dim (int): Size of the last dimension of the input tensor.
+        eps (float, optional): A small constant for numerical stability. Default: 1e-6.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        eps: float = 1e-6,
+        device: Device | str | None = None,
+        dtype: DType | None = None,
+    ) -> None:
+        super().__init__()
+        self.dim = dim
+        self.weight = nn.Parameter(ones(dim, device=device, dtype=dtype))
+        self.eps = eps
+
+    def forward(self, x: Float[Tensor, "*batch dim"]) -> Float[Tensor, "*batch dim"]:
+        # The statistic is computed in float32: in half precision, x**2 overflows for activations with an RMS above ~256
+        x_float = x.float()
+        x_norm = x_float * rsqrt(x_float.pow(2).mean(-1, keepdim=True) + self.eps)
+        return x_norm.to(x.dtype) * self.weight
 
 
 class InstanceNorm2d(nn.InstanceNorm2d, Module):
+    """
+    2D Instance Normalization module.
+
+    Statistics are always computed from the input: there is no affine transform and no running statistics buffers.
+    """
+
     def __init__(
         self,
         num_features: int,
@@ -83,6 +136,8 @@ class InstanceNorm2d(nn.InstanceNorm2d, Module):
         super().__init__(  # type: ignore
             num_features=num_features,
             eps=eps,
+            affine=False,  # otherwise a WeightedModule
+            track_running_stats=False,
             device=device,
             dtype=dtype,
         )
@@ -1,14 +1,14 @@
-import math
+from collections import defaultdict
 from typing import TYPE_CHECKING, Any, Generic, TypeVar
 
 from jaxtyping import Float
 from PIL import Image
-from torch import Tensor, cat, device as Device, dtype as DType, nn, softmax, zeros_like
+from torch import Tensor, cat, device as Device, dtype as DType, nn, zeros_like
 
 import refiners.fluxion.layers as fl
 from refiners.fluxion.adapters.adapter import Adapter
 from refiners.fluxion.context import Contexts
-from refiners.fluxion.layers.attentions import ScaledDotProductAttention
+from refiners.fluxion.layers.attentions import ScaledDotProductAttention, scaled_dot_product_attention
 from refiners.fluxion.utils import image_to_tensor, normalize
 from refiners.foundationals.clip.image_encoder import CLIPImageEncoderH
 
@@ -80,10 +80,8 @@ class FeedForward(fl.Chain):
 class PerceiverScaledDotProductAttention(fl.Module):
     def __init__(self, head_dim: int, num_heads: int) -> None:
         super().__init__()
+        self.head_dim = head_dim
         self.num_heads = num_heads
-        # See https://github.com/tencent-ailab/IP-Adapter/blob/6212981/ip_adapter/resampler.py#L69
-        # -> "More stable with f16 than dividing afterwards"
-        self.scale = 1 / math.sqrt(math.sqrt(head_dim))
 
     def forward(
         self,
@@ -97,9 +95,10 @@ class PerceiverScaledDotProductAttention(fl.Module):
         k = self.reshape_tensor(key)
         v = self.reshape_tensor(value)
 
-        attention = (q * self.scale) @ (k * self.scale).transpose(-2, -1)
-        attention = softmax(input=attention.float(), dim=-1).type(attention.dtype)
-        attention = attention @ v
+        # The reference implementation scales q and k by 1 / head_dim**0.25 each before a manual f32 softmax, see
+        # https://github.com/tencent-ailab/IP-Adapter/blob/6212981/ip_adapter/resampler.py#L69. The fused kernel uses
+        # the same overall 1 / sqrt(head_dim) scale and a numerically stable softmax without materializing attention.
+        attention = scaled_dot_product_attention(q, k, v)
 
         return attention.permute(0, 2, 1, 3).reshape(bs, length, -1)
 
@@ -258,12 +257,14 @@ class ImageCrossAttention(fl.Chain):
                         device=text_cross_attention.device,
                         dtype=text_cross_attention.dtype,
                     ),
+                    # Attention is linear in the values: scaling them (a few image tokens) is equivalent to scaling
+                    # the output (one row per query, e.g. one per latent pixel) but much cheaper.
+                    fl.Multiply(self.scale),
                 ),
             ),
             ScaledDotProductAttention(
                 num_heads=text_cross_attention.num_heads, is_causal=text_cross_attention.is_causal
             ),
-            fl.Multiply(self.scale),
         )
 
     @property
@@ -354,7 +355,8 @@ class IPAdapter(Generic[T], fl.Chain, Adapter[T]):
 
         self.sub_adapters = [
             CrossAttentionAdapter(target=cross_attn, scale=scale)
-            for cross_attn in filter(lambda attn: type(attn) != fl.SelfAttention, target.layers(fl.Attention))
+            for cross_attn in target.layers(fl.Attention)
+            if type(cross_attn) != fl.SelfAttention
         ]
 
         if weights is not None:
@@ -363,16 +365,15 @@ class IPAdapter(Generic[T], fl.Chain, Adapter[T]):
             }
             self.image_proj.load_state_dict(image_proj_state_dict)
 
-            for i, cross_attn in enumerate(self.sub_adapters):
-                cross_attention_weights: list[Tensor] = []
-                for k, v in weights.items():
-                    prefix = f"ip_adapter.{i:03d}."
-                    if not k.startswith(prefix):
-                        continue
-                    cross_attention_weights.append(v)
+            # Group the `ip_adapter.{i:03d}.*` weights in a single pass instead of scanning them for every sub-adapter
+            cross_attention_weights: defaultdict[int, list[Tensor]] = defaultdict(list)
+            for k, v in weights.items():
+                if k.startswith("ip_adapter."):
+                    cross_attention_weights[int(k.split(".")[1])].append(v)
 
-                assert len(cross_attention_weights) == 2
-                cross_attn.load_weights(*cross_attention_weights)
+            for i, cross_attn in enumerate(self.sub_adapters):
+                assert len(cross_attention_weights[i]) == 2
+                cross_attn.load_weights(*cross_attention_weights[i])
 
     @property
     def clip_image_encoder(self) -> CLIPImageEncoderH:
@@ -411,6 +412,8 @@ class IPAdapter(Generic[T], fl.Chain, Adapter[T]):
             cross_attn.scale = scale
 
     def set_clip_image_embedding(self, image_embedding: Tensor) -> None:
+        # Moved once here (no-op if already there) so that cross-attention blocks always read it from the UNet device
+        image_embedding = image_embedding.to(device=self.target.device, dtype=self.target.dtype)
         self.set_context("ip_adapter", {"clip_image_embedding": image_embedding})
 
     # These should be concatenated to the CLIP text embedding before setting the UNet context
@@ -418,12 +421,13 @@ class IPAdapter(Generic[T], fl.Chain, Adapter[T]):
         image_encoder = self.clip_image_encoder if not self.fine_grained else self.grid_image_encoder
         clip_embedding = image_encoder(image_prompt)
         conditional_embedding = self.image_proj(clip_embedding)
+        # The negative embedding does not depend on the image prompt: compute it once and broadcast it to the batch
         if not self.fine_grained:
-            negative_embedding = self.image_proj(zeros_like(clip_embedding))
+            negative_embedding = self.image_proj(zeros_like(clip_embedding[:1]))
         else:
             # See https://github.com/tencent-ailab/IP-Adapter/blob/d580c50/tutorial_train_plus.py#L351-L352
-            clip_embedding = image_encoder(zeros_like(image_prompt))
-            negative_embedding = self.image_proj(clip_embedding)
+            negative_embedding = self.image_proj(image_encoder(zeros_like(image_prompt[:1])))
+        negative_embedding = negative_embedding.expand(conditional_embedding.shape[0], -1, -1)
         return cat((negative_embedding, conditional_embedding))
 
     def preprocess_image(
@@ -1,4 +1,4 @@
-from torch import Generator, Tensor, arange, device as Device, dtype as Dtype, float32, sqrt, tensor
+from torch import Generator, Tensor, addcmul, arange, cat, device as Device, dtype as Dtype, float32, sqrt
 
 from refiners.foundationals.latent_diffusion.schedulers.scheduler import NoiseSchedule, Scheduler
 
@@ -23,7 +23,26 @@ class DDIM(Scheduler):
             device=device,
             dtype=dtype,
         )
-        self.timesteps = self._generate_timesteps()
+
+    @property
+    def timesteps(self) -> Tensor:  # type: ignore
+        return self._timesteps
+
+    @timesteps.setter
+    def timesteps(self, value: Tensor) -> None:  # type: ignore
+        # The scale factors of each step only depend on the timesteps: precompute them whenever those are (re)assigned
+        # (e.g. by `Restart`) so that `__call__` is a lookup and a few elementwise ops, without host-device syncs.
+        self._timesteps = value
+        previous_timesteps = cat((value[1:], value.new_zeros(1)))  # the last step goes to timestep 0
+        current_scale_factors = self.cumulative_scale_factors[value]
+        previous_scale_factors = self.cumulative_scale_factors[previous_timesteps]
+        # predicted_x = (x - sqrt(1 - current**2) * noise) / current
+        # denoised_x = previous * predicted_x + sqrt(1 - previous**2) * noise
+        # i.e. denoised_x = x_coefficient * x + noise_coefficient * noise
+        self._x_coefficients = previous_scale_factors / current_scale_factors
+        self._noise_coefficients = sqrt(1 - previous_scale_factors**2) - self._x_coefficients * sqrt(
+            1 - current_scale_factors**2
+        )
 
     def _generate_timesteps(self) -> Tensor:
         """
@@ -31,27 +50,15 @@ class DDIM(Scheduler):
         similar to diffusers settings for the DDIM scheduler in Stable Diffusion 1.5
         """
         step_ratio = self.num_train_timesteps // self.num_inference_steps
-        timesteps = arange(start=0, end=self.num_inference_steps, step=1, device=self.device) * step_ratio + 1
-        return timesteps.flip(0)
+        # Built in decreasing order on CPU then moved in a single copy, rather than launching one kernel per op on device
+        timesteps = arange(start=self.num_inference_steps - 1, end=-1, step=-1) * step_ratio + 1
+        return timesteps.to(device=self.device)
 
     def __call__(self, x: Tensor, noise: Tensor, step: int, generator: Generator | None = None) -> Tensor:
-        timestep, previous_timestep = (
-            self.timesteps[step],
-            (
-                self.timesteps[step + 1]
-                if step < self.num_inference_steps - 1
-                else tensor(data=[0], device=self.device, dtype=self.dtype)
-            ),
-        )
-        current_scale_factor, previous_scale_factor = (
-            self.cumulative_scale_factors[timestep],
-            (
-                self.cumulative_scale_factors[previous_timestep]
-                if previous_timestep > 0
-                else self.cumulative_scale_factors[0]
-            ),
-        )
-        predicted_x = (x - sqrt(1 - current_scale_factor**2) * noise) / current_scale_factor
-        denoised_x = previous_scale_factor * predicted_x + sqrt(1 - previous_scale_factor**2) * noise
+        # x_coefficient * x + noise_coefficient * noise, with the second product and the sum fused in one kernel
+        return addcmul(self._x_coefficients[step] * x, self._noise_coefficients[step], noise)
 
-        return denoised_x
+    def to(self, device: Device | str | None = None, dtype: Dtype | None = None) -> "DDIM":  # type: ignore
+        super().to(device=device, dtype=dtype)
+        self.timesteps = self.timesteps  # refresh the per-step scale factors
+        return self
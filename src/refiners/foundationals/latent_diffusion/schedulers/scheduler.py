@@ -122,13 +122,13 @@ class Scheduler(ABC):
         return denoised_x
 
     def to(self: T, device: Device | str | None = None, dtype: DType | None = None) -> T:  # type: ignore
-        if device is not None:
-            self.device = Device(device)
-            self.timesteps = self.timesteps.to(device)
         if dtype is not None:
             self.dtype = dtype
         self.scale_factors = self.scale_factors.to(device, dtype=dtype)
         self.cumulative_scale_factors = self.cumulative_scale_factors.to(device, dtype=dtype)
         self.noise_std = self.noise_std.to(device, dtype=dtype)
         self.signal_to_noise_ratios = self.signal_to_noise_ratios.to(device, dtype=dtype)
+        if device is not None:
+            self.device = Device(device)
+            self.timesteps = self.timesteps.to(device)
         return self
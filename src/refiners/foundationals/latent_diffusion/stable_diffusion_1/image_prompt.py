@@ -20,11 +20,13 @@ class SD1IPAdapter(IPAdapter[SD1UNet]):
 
         if image_proj is None:
             cross_attn_2d = target.ensure_find(CrossAttentionBlock2d)
+            # All parameters are overwritten when weights are given: skip allocating and initializing them twice
+            image_proj_device = "meta" if weights is not None else target.device
             image_proj = (
                 ImageProjection(
                     clip_image_embedding_dim=clip_image_encoder.output_dim,
                     clip_text_embedding_dim=cross_attn_2d.context_embedding_dim,
-                    device=target.device,
+                    device=image_proj_device,
                     dtype=target.dtype,
                 )
                 if not fine_grained
@@ -36,10 +38,12 @@ class SD1IPAdapter(IPAdapter[SD1UNet]):
                     num_tokens=16,
                     input_dim=clip_image_encoder.embedding_dim,  # = dim before final projection
                     output_dim=cross_attn_2d.context_embedding_dim,
-                    device=target.device,
+                    device=image_proj_device,
                     dtype=target.dtype,
                 )
             )
+            if weights is not None:
+                image_proj.to_empty(device=target.device)  # filled by `load_state_dict` (strict) in `IPAdapter`
         elif fine_grained:
             assert isinstance(image_proj, PerceiverResampler)
 
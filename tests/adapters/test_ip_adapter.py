@@ -0,0 +1,139 @@
+from typing import Any
+
+import pytest
+import torch
+
+import refiners.fluxion.layers as fl
+from refiners.fluxion import manual_seed
+from refiners.foundationals.clip.image_encoder import CLIPImageEncoder
+from refiners.foundationals.latent_diffusion.image_prompt import (
+    CrossAttentionAdapter,
+    ImageProjection,
+    IPAdapter,
+    PerceiverResampler,
+)
+
+
+def new_target() -> fl.Chain:
+    # Two cross-attention blocks and a self-attention one (which must not be adapted)
+    return fl.Chain(
+        fl.Attention(embedding_dim=32, num_heads=2, key_embedding_dim=16, value_embedding_dim=16),
+        fl.Chain(
+            fl.SelfAttention(embedding_dim=32, num_heads=2),
+            fl.Attention(embedding_dim=32, num_heads=2, key_embedding_dim=16, value_embedding_dim=16),
+        ),
+    )
+
+
+def new_clip_image_encoder(num_layers: int = 1) -> CLIPImageEncoder:
+    return CLIPImageEncoder(
+        image_size=32,
+        embedding_dim=16,
+        output_dim=8,
+        patch_size=16,
+        num_layers=num_layers,
+        num_attention_heads=2,
+        feedforward_dim=32,
+    )
+
+
+def test_cross_attention_adapter_scale() -> None:
+    manual_seed(0)
+    chain = fl.Chain(fl.Attention(embedding_dim=32, num_heads=2, key_embedding_dim=16, value_embedding_dim=16))
+    x = torch.randn(2, 10, 32)
+    text_embedding = torch.randn(2, 7, 16)
+    expected = chain(x, text_embedding, text_embedding)
+
+    adapter = CrossAttentionAdapter(target=chain.Attention, scale=0.0).inject(chain)
+    chain.set_context("ip_adapter", {"clip_image_embedding": torch.randn(2, 4, 16)})
+    assert torch.equal(chain(x, text_embedding, text_embedding), expected)
+
+    # The image contribution is linear in the scale (applied to its values)
+    adapter.scale = 1.0
+    image_contribution = chain(x, text_embedding, text_embedding) - expected
+    assert image_contribution.abs().max() > 1e-3
+    adapter.scale = 2.5
+    assert torch.allclose(chain(x, text_embedding, text_embedding) - expected, 2.5 * image_contribution, atol=1e-5)
+
+
+def new_ip_adapter(
+    image_proj: fl.Module, weights: dict[str, torch.Tensor] | None = None, fine_grained: bool = False
+) -> IPAdapter[Any]:
+    return IPAdapter(
+        target=new_target(),  # type: ignore
+        # `convert_to_grid_features` expects the 32 layers of `CLIPImageEncoderH`
+        clip_image_encoder=new_clip_image_encoder(num_layers=32 if fine_grained else 1),  # type: ignore
+        image_proj=image_proj,
+        fine_grained=fine_grained,
+        weights=weights,
+    )
+
+
+def test_ip_adapter_load_weights_into_empty_image_proj() -> None:
+    manual_seed(0)
+    source_image_proj = ImageProjection(clip_image_embedding_dim=8, clip_text_embedding_dim=16)
+    weights = {f"image_proj.{k}": v for k, v in source_image_proj.state_dict().items()}
+    for i in range(2):
+        weights[f"ip_adapter.{i:03d}.to_k_ip.weight"] = torch.randn(32, 16)
+        weights[f"ip_adapter.{i:03d}.to_v_ip.weight"] = torch.randn(32, 16)
+
+    # As done by `SD1IPAdapter` when weights are given: parameters are left uninitialized until loaded
+    image_proj = ImageProjection(clip_image_embedding_dim=8, clip_text_embedding_dim=16, device="meta")
+    image_proj.to_empty(device="cpu")
+    adapter = new_ip_adapter(image_proj=image_proj, weights=weights)
+
+    for k, v in adapter.image_proj.state_dict().items():
+        assert torch.equal(v, weights[f"image_proj.{k}"]), k
+
+    assert len(adapter.sub_adapters) == 2
+    for i, cross_attn in enumerate(adapter.sub_adapters):
+        assert torch.equal(cross_attn.image_key_projection.weight, weights[f"ip_adapter.{i:03d}.to_k_ip.weight"])
+        assert torch.equal(cross_attn.image_value_projection.weight, weights[f"ip_adapter.{i:03d}.to_v_ip.weight"])
+
+    image_proj = ImageProjection(clip_image_embedding_dim=8, clip_text_embedding_dim=16, device="meta")
+    image_proj.to_empty(device="cpu")
+    with pytest.raises(RuntimeError, match="Missing key"):
+        new_ip_adapter(
+            image_proj=image_proj, weights={k: v for k, v in weights.items() if k != "image_proj.Linear.weight"}
+        )
+
+
+def test_ip_adapter_compute_clip_image_embedding() -> None:
+    manual_seed(0)
+    adapter = new_ip_adapter(image_proj=ImageProjection(clip_image_embedding_dim=8, clip_text_embedding_dim=16))
+    image_prompt = torch.randn(3, 3, 32, 32)
+
+    clip_embedding = adapter.clip_image_encoder(image_prompt)
+    expected = torch.cat(
+        (adapter.image_proj(torch.zeros_like(clip_embedding)), adapter.image_proj(clip_embedding)),
+    )
+
+    output = adapter.compute_clip_image_embedding(image_prompt)
+    assert output.shape == expected.shape == (6, 4, 16)
+    assert torch.allclose(output, expected, atol=1e-6)
+
+
+def test_ip_adapter_compute_clip_image_embedding_fine_grained() -> None:
+    manual_seed(0)
+    image_proj = PerceiverResampler(
+        latents_dim=16,
+        num_attention_layers=1,
+        num_attention_heads=2,
+        head_dim=8,
+        num_tokens=4,
+        input_dim=16,
+        output_dim=16,
+    )
+    adapter = new_ip_adapter(image_proj=image_proj, fine_grained=True)
+    image_prompt = torch.randn(3, 3, 32, 32)
+
+    expected = torch.cat(
+        (
+            adapter.image_proj(adapter.grid_image_encoder(torch.zeros_like(image_prompt))),
+            adapter.image_proj(adapter.grid_image_encoder(image_prompt)),
+        )
+    )
+
+    output = adapter.compute_clip_image_embedding(image_prompt)
+    assert output.shape == expected.shape == (6, 4, 16)
+    assert torch.allclose(output, expected, atol=1e-6)
@@ -0,0 +1,85 @@
+import torch
+
+import refiners.fluxion.layers as fl
+from refiners.fluxion import manual_seed
+
+
+def test_layer_norm_2d() -> None:
+    manual_seed(0)
+    layer_norm_2d = fl.LayerNorm2d(channels=8)
+    torch.nn.init.normal_(layer_norm_2d.weight)
+    torch.nn.init.normal_(layer_norm_2d.bias)
+    x = torch.randn(2, 8, 5, 7)
+
+    x_mean = x.mean(1, keepdim=True)
+    x_var = (x - x_mean).pow(2).mean(1, keepdim=True)
+    x_norm = (x - x_mean) / torch.sqrt(x_var + layer_norm_2d.eps)
+    expected = layer_norm_2d.weight[:, None, None] * x_norm + layer_norm_2d.bias[:, None, None]
+
+    output = layer_norm_2d(x)
+    assert output.shape == x.shape
+    assert output.is_contiguous()
+    assert torch.allclose(output, expected, atol=1e-6)
+
+    output = layer_norm_2d(x.to(memory_format=torch.channels_last))
+    assert output.is_contiguous(memory_format=torch.channels_last)
+    assert torch.allclose(output, expected, atol=1e-6)
+
+
+def test_layer_norm_2d_normalizes_over_channels_only() -> None:
+    manual_seed(0)
+    layer_norm_2d = fl.LayerNorm2d(channels=8)
+    x = torch.randn(2, 8, 5, 7) * torch.arange(1, 36).reshape(1, 1, 5, 7)
+
+    output = layer_norm_2d(x)
+    assert torch.allclose(output.mean(dim=1), torch.zeros(2, 5, 7), atol=1e-5)
+    assert torch.allclose(output.var(dim=1, unbiased=False), torch.ones(2, 5, 7), atol=1e-3)
+
+    group_norm = torch.nn.functional.group_norm(x, num_groups=1, eps=layer_norm_2d.eps)
+    assert not torch.allclose(output, group_norm, atol=1e-3)
+
+
+def test_layer_norm_2d_large_offset() -> None:
+    manual_seed(0)
+    layer_norm_2d = fl.LayerNorm2d(channels=64)
+    x = torch.randn(1, 64, 4, 4)
+
+    # statistics must be computed in a numerically stable way (not as E[x^2] - E[x]^2)
+    output = layer_norm_2d(x + 1e4)
+    assert torch.allclose(output, layer_norm_2d(x), atol=1e-2)
+
+
+def test_layer_norm_no_bias() -> None:
+    manual_seed(0)
+    layer_norm = fl.LayerNorm(normalized_shape=768, use_bias=False)
+    assert layer_norm.bias is None
+    torch.nn.init.normal_(layer_norm.weight)
+    x = torch.randn(2, 77, 768)
+
+    x_mean = x.mean(-1, keepdim=True)
+    x_std = torch.sqrt(x.var(-1, unbiased=False, keepdim=True) + layer_norm.eps)
+    expected = (x - x_mean) / x_std * layer_norm.weight
+
+    assert torch.allclose(layer_norm(x), expected, atol=1e-5)
+
+
+def test_rms_norm() -> None:
+    manual_seed(0)
+    rms_norm = fl.RMSNorm(dim=64)
+    torch.nn.init.normal_(rms_norm.weight)
+    x = torch.randn(2, 10, 64)
+
+    expected = x / torch.sqrt(x.pow(2).mean(-1, keepdim=True) + rms_norm.eps) * rms_norm.weight
+
+    assert torch.allclose(rms_norm(x), expected, atol=1e-6)
+
+    # x**2 overflows in float16 for large activations: the statistic must be computed in float32
+    rms_norm_half = fl.RMSNorm(dim=64, dtype=torch.float16)
+    x = torch.randn(2, 10, 64) * 1000
+    output = rms_norm_half(x.half())
+    expected = fl.RMSNorm(dim=64)(x)
+
+    assert output.dtype == torch.float16
+    assert torch.isfinite(output).all()
+    assert torch.allclose(output.float(), expected, atol=1e-2)
+    assert torch.allclose(rms_norm_half(torch.full((1, 64), 300.0, dtype=torch.float16)).float(), torch.ones(1, 64))
@@ -2,7 +2,7 @@ from typing import cast
 from warnings import warn
 
 import pytest
-from torch import Tensor, allclose, device as Device, equal, isclose, randn
+from torch import Tensor, allclose, arange, device as Device, equal, float16, isclose, randn
 
 from refiners.fluxion import manual_seed
 from refiners.foundationals.latent_diffusion.schedulers import DDIM, DDPM, DPMSolver, EulerScheduler
@@ -63,6 +63,59 @@ def test_ddim_diffusers():
         assert allclose(diffusers_output, refiners_output, rtol=0.01), f"outputs differ at step {step}"
 
 
+def ddim_reference_step(scheduler: DDIM, x: Tensor, noise: Tensor, step: int) -> Tensor:
+    timestep = scheduler.timesteps[step]
+    previous_timestep = scheduler.timesteps[step + 1] if step < len(scheduler.timesteps) - 1 else 0
+    current_scale_factor = scheduler.cumulative_scale_factors[timestep]
+    previous_scale_factor = scheduler.cumulative_scale_factors[previous_timestep]
+    predicted_x = (x - (1 - current_scale_factor**2).sqrt() * noise) / current_scale_factor
+    return previous_scale_factor * predicted_x + (1 - previous_scale_factor**2).sqrt() * noise
+
+
+def test_ddim_step() -> None:
+    manual_seed(0)
+
+    scheduler = DDIM(num_inference_steps=30)
+    x = randn(1, 4, 32, 32)
+    noise = randn(1, 4, 32, 32)
+
+    for step in range(len(scheduler.timesteps)):
+        expected = ddim_reference_step(scheduler, x, noise, step)
+        assert allclose(scheduler(x=x, noise=noise, step=step), expected, atol=1e-5), f"outputs differ at step {step}"
+
+
+def test_ddim_reassigned_timesteps() -> None:
+    manual_seed(0)
+
+    scheduler = DDIM(num_inference_steps=30)
+    # as done by `Restart`: the per-step coefficients must follow the new timesteps
+    scheduler.timesteps = arange(start=501, end=0, step=-50)
+    x = randn(1, 4, 32, 32)
+    noise = randn(1, 4, 32, 32)
+
+    for step in range(len(scheduler.timesteps)):
+        expected = ddim_reference_step(scheduler, x, noise, step)
+        assert allclose(scheduler(x=x, noise=noise, step=step), expected, atol=1e-5), f"outputs differ at step {step}"
+
+
+def test_ddim_to_dtype() -> None:
+    manual_seed(0)
+
+    reference = DDIM(num_inference_steps=30)
+    scheduler = DDIM(num_inference_steps=30).to(dtype=float16)
+    assert scheduler._x_coefficients.dtype == float16  # type: ignore
+    assert scheduler._noise_coefficients.dtype == float16  # type: ignore
+
+    x = randn(1, 4, 32, 32)
+    noise = randn(1, 4, 32, 32)
+    for step in range(len(scheduler.timesteps)):
+        output = scheduler(x=x.half(), noise=noise.half(), step=step)
+        assert output.dtype == float16
+        assert allclose(output.float(), reference(x=x, noise=noise, step=step), atol=2e-2), (
+            f"outputs differ at step {step}"
+        )
+
+
 def test_euler_diffusers():
     from diffusers import EulerDiscreteScheduler  # type: ignore
 